@@ -1,4 +1,5 @@
 from collections import defaultdict
+import concurrent.futures
 from enum import Enum
 from enum import auto
 import time
@@ -13,13 +14,17 @@ class Team(Enum):
 
 class Tag(object):
     def __hash__(self):
-        return hash(self.rfid)
+        return self._hash
     def __eq__(self, rhs):
         return isinstance(rhs, Tag) and self.rfid == rhs.rfid
 
     def __init__(self, rfid, team):
-        # RFID tag (a String)
-        self.rfid = rfid
+        # RFID tag (a String). Interned, so that comparing two equal ids is usually just an identity check.
+        # Only plain strings can be interned; any other kind of id is kept as given.
+        self.rfid = sys.intern(rfid) if type(rfid) is str else rfid
+
+        # Tags are hashed constantly while tallying scores, and the rfid never changes.
+        self._hash = hash(self.rfid)
 
         # A Team Enum
         self.team = team
@@ -56,10 +61,11 @@ class Sensor(object):
     # Check if the given tag was read in the most recent reading.
     # Do not perform a new reading.
     def was_tag_read(self, tag):
-        return self.latest_reading.count(tag.rfid) > 0
+        return tag.rfid in self.latest_reading_set
 
     def read(self):
         self.latest_reading = self.read_tag_ids(self.id)
+        self.latest_reading_set = frozenset(self.latest_reading)
         return self.latest_reading
 
     def __init__(self, sensor_id, weight, location, read_tags, points):
@@ -80,11 +86,76 @@ class Sensor(object):
         # Results of latest call to read_tag_ids (List of string ids of Tags)
         self.latest_reading = []
 
+        # The same ids as latest_reading, as a set for fast membership tests
+        self.latest_reading_set = frozenset()
+
         # If this sensor trips, how many points should be awarded? 
         # The maximum (not sum) of all possible points from all tripped sensors is used.
         # Typically 1 for board sensor, 3 for hole sensor.
         self.points_to_award = points
 
+##########################################
+#                 Tally                  #
+##########################################
+
+# Compute the turn scores for both teams on both boards from the latest reading of each sensor.
+# Kept separate from Game and given only plain arguments, so that the inner loop touches nothing but local variables.
+# The sensors and tags are passed as parallel sequences (one per attribute) instead of as objects.
+#    sensor_group ........ location index of each sensor: 0 for BOARD_1, 1 for HOLE_1, 2 for BOARD_2 and 3 for HOLE_2
+#    sensor_weight ....... weight of each sensor
+#    sensor_points ....... points awarded by each sensor
+#    reading_tags ........ indices of the tags in the latest reading of all the sensors, one sensor after another
+#    reading_offsets ..... where each sensor's tags start in reading_tags; has one more element than there are sensors
+#    tag_team ............ team of each tag: 0 for Team A, 1 for Team B, -1 for neither
+#    minimum_weight ...... sum of sensor weights needed for a tag to count
+#    max_score_per_tag ... scratch space: four lists (one per location) as long as tag_team; overwritten
+#    hits_per_tag ........ scratch space: four lists (one per location) as long as tag_team; overwritten
+#    verified_tags ....... scratch space: a list of four ints (one bitset per location); overwritten
+#    zeros ............... a tuple of zeros as long as tag_team, used to clear the scratch lists
+# The scratch space is reused between calls to avoid allocating it each time,
+# so this is not reentrant: concurrent calls must not share the same scratch lists.
+# Returns the tuple (team A board 1, team B board 1, team A board 2, team B board 2).
+def tally_all(sensor_group, sensor_weight, sensor_points, reading_tags, reading_offsets, tag_team, minimum_weight,
+        max_score_per_tag, hits_per_tag, verified_tags, zeros):
+    # Clear what the previous call left in the scratch space. Both are indexed by [location][tag index].
+    for group in range(4):
+        max_score_per_tag[group][:] = zeros
+        hits_per_tag[group][:] = zeros
+    # One bitset per location, with bit i set once tag i has enough hits to count.
+    verified_tags[:] = (0, 0, 0, 0)
+    for sensor_index in range(len(sensor_group)):
+        group = sensor_group[sensor_index]
+        weight = sensor_weight[sensor_index]
+        points = sensor_points[sensor_index]
+        group_max_score = max_score_per_tag[group]
+        group_hits = hits_per_tag[group]
+        verified = verified_tags[group]
+        for k in range(reading_offsets[sensor_index], reading_offsets[sensor_index + 1]):
+            tag_index = reading_tags[k]
+            group_max_score[tag_index] = max(group_max_score[tag_index], points)
+            # Once a tag is verified, further hits cannot change that,
+            # so stop counting them and comparing against the threshold.
+            if not verified >> tag_index & 1:
+                hits = group_hits[tag_index] + weight
+                group_hits[tag_index] = hits
+                if hits >= minimum_weight:
+                    verified |= 1 << tag_index
+        verified_tags[group] = verified
+    tallies = [0, 0, 0, 0]
+    for group in range(4):
+        # Board 1 scores go in slots 0 & 1, board 2 scores in slots 2 & 3.
+        slot = 2 * (group // 2)
+        group_max_score = max_score_per_tag[group]
+        verified = verified_tags[group]
+        while verified:
+            lowest_bit = verified & -verified
+            verified ^= lowest_bit
+            tag_index = lowest_bit.bit_length() - 1
+            team = tag_team[tag_index]
+            if team >= 0:
+                tallies[slot + team] += group_max_score[tag_index]
+    return tuple(tallies)
+
 ##########################################
 #                  Game                  #
 ##########################################
@@ -103,11 +174,19 @@ class Game(object):
         self.team_a_turn_score = 0
         self.team_b_turn_score = 0
         self.last_board_played = 0
-        self.turn_number = 1
+        self._set_turn_number(1)
         # Time (in seconds since the epoch) when the turn started.
         # Ignore a button press is the turn has not lasted long enough, in case the player held the button down a long time 
         # and it triggered multiple times.
         self.time_of_turn_start = time.time()
+        # Time (in seconds since the epoch) after which button presses are no longer ignored.
+        self._turn_button_enable_time = self.time_of_turn_start + 4
+
+    # Set the turn number along with the message shown during play, which is built from it.
+    # Always change turn_number through this, so the message cannot go stale.
+    def _set_turn_number(self, turn_number):
+        self.turn_number = turn_number
+        self._turn_message = f'Turn {turn_number}'
 
     # End the turn, add the turn score to the game score, and zero out the turn scores.
     #   Only the team with the higher score for the turn sees their score increase.
@@ -121,22 +200,56 @@ class Game(object):
             self.team_b_game_score += abs(score_diff)
         self.team_a_turn_score = 0
         self.team_b_turn_score = 0
-        self.turn_number += 1
+        self._set_turn_number(self.turn_number + 1)
         self.time_of_turn_start = time.time()
+        self._turn_button_enable_time = self.time_of_turn_start + 4
 
     ##########################################
     #        Filtering Sensors & Tags        #
     ##########################################
 
+    # Build the lookup tables used when tallying scores.
+    # Must be called again if self.tags or self.sensors is replaced or modified.
+    def index_tags_and_sensors(self):
+        # Iterate in reverse so that if two tags share an rfid, the first one wins.
+        self._tag_by_rfid = {tag.rfid: tag for tag in reversed(self.tags)}
+        self._tags_by_team = {team: frozenset(tag for tag in self.tags if tag.team is team) for team in Team}
+        self._sensors_by_location = {location: tuple(sensor for sensor in self.sensors if sensor.location is location) for location in Location}
+
+        # Tags and sensors again, as parallel tuples (one per attribute), for use by tally_all.
+        # Tags are identified by their position in self.tags.
+        self._rfid_to_tag_index = {tag.rfid: index for index, tag in reversed(list(enumerate(self.tags)))}
+        team_index = {Team.A: 0, Team.B: 1}
+        self._tag_team = tuple(team_index.get(tag.team, -1) for tag in self.tags)
+        # Reused by every call to tally_all, rather than allocating new ones each time.
+        self._max_score_scratch = tuple([0] * len(self.tags) for group in range(4))
+        self._hits_scratch = tuple([0] * len(self.tags) for group in range(4))
+        self._verified_scratch = [0, 0, 0, 0]
+        self._zero_scratch = (0,) * len(self.tags)
+        # Sensors at an unknown location never contribute to the score, so are left out.
+        group_of_location = {Location.BOARD_1: 0, Location.HOLE_1: 1, Location.BOARD_2: 2, Location.HOLE_2: 3}
+        self._scoring_sensors = tuple(sensor for sensor in self.sensors if sensor.location in group_of_location)
+        self._sensor_group = tuple(group_of_location[sensor.location] for sensor in self._scoring_sensors)
+        self._sensor_weight = tuple(sensor.weight for sensor in self._scoring_sensors)
+        self._sensor_points = tuple(sensor.points_to_award for sensor in self._scoring_sensors)
+
+        # Translate the latest readings using the new indexes and forget any tallies computed with the old ones.
+        self._decode_readings()
+        self._tally_cache_seq = -1
+
+    # Get a tuple of the Sensors at the given location.
+    # The tuple is built by index_tags_and_sensors and shared between calls.
     def get_sensors_for_location(self, location):
-        return list(filter(lambda sensor: (sensor.location == location), self.sensors))
+        return self._sensors_by_location[location]
 
+    # Get a frozenset of the Tags that belong to the given team.
+    # The set is built by index_tags_and_sensors and shared between calls.
     def get_tags_for_team(self, team):
-        return list(filter(lambda tag: (tag.team == team), self.tags))
+        return self._tags_by_team[team]
 
     # Get the Tag that has the given rfid, or None
     def get_tag_by_id(self, rfid):
-        return (list(filter(lambda tag: (tag.rfid == rfid), self.tags)) or [None])[0]
+        return self._tag_by_rfid.get(rfid)
 
     ##########################################
     #       Computing and Checking Scores    #
@@ -149,51 +262,78 @@ class Game(object):
     # However, each sensor increases the likelihood that the tag will count toward the score.
     # (It is possible for a tag to be ignored if it is deemed a false positive due to not being picked up by enough sensors.)
     def tally_location(self, team, location):
-        tags_for_team = set(self.get_tags_for_team(team))
-        max_score_per_tag = defaultdict(lambda : 0)
-        hits_per_tag = defaultdict(lambda : 0)
+        tags_for_team = self._tags_by_team[team]
+        tag_by_rfid = self._tag_by_rfid
+        minimum_weight = self.minimum_sensor_weight
+        max_score_per_tag = defaultdict(int)
+        hits_per_tag = defaultdict(int)
         verified_tags = set()
-        for sensor in self.get_sensors_for_location(location):
+        for sensor in self._sensors_by_location[location]:
             for rfid in sensor.latest_reading:
-                tag = self.get_tag_by_id(rfid)
+                tag = tag_by_rfid.get(rfid)
                 if tag is not None and (tag in tags_for_team):
                     max_score_per_tag[tag] = max(max_score_per_tag[tag], sensor.points_to_award)
-                    hits_per_tag[tag] += sensor.weight
-                    if hits_per_tag[tag] >= self.minimum_sensor_weight:
-                        verified_tags.add(tag)
+                    # Once a tag is verified, further hits cannot change that.
+                    if tag not in verified_tags:
+                        hits_per_tag[tag] += sensor.weight
+                        if hits_per_tag[tag] >= minimum_weight:
+                            verified_tags.add(tag)
         tally = 0
         for verified_tag in verified_tags:
             tally += max_score_per_tag[verified_tag]
         return tally
                 
+    # Compute the turn scores for both teams on both boards in a single pass over the most recent sensor readings.
+    # Gives the same results as summing tally_location over the board and hole of each board,
+    # but visits each sensor only once.
+    # Returns the tuple (team A board 1, team B board 1, team A board 2, team B board 2).
+    def _tally_all(self):
+        return tally_all(self._sensor_group, self._sensor_weight, self._sensor_points, 
+            self._reading_tags, self._reading_offsets, self._tag_team, self.minimum_sensor_weight,
+            self._max_score_scratch, self._hits_scratch, self._verified_scratch, self._zero_scratch)
+
+    # Compute the turn scores for both teams on both boards from the most recent sensor reading,
+    # unless they have already been computed for that reading and the current minimum_sensor_weight.
+    # Only readings taken by read_sensors are seen: calling sensor.read() directly does not
+    # update the decoded readings or invalidate the cache, so the tallies would be stale.
+    # Returns the tuple (team A board 1, team B board 1, team A board 2, team B board 2).
+    def _ensure_tallies(self):
+        if self._tally_cache_seq != self._sensor_read_seq or self._tally_cache_weight != self.minimum_sensor_weight:
+            self._tally_cache = self._tally_all()
+            self._tally_cache_seq = self._sensor_read_seq
+            self._tally_cache_weight = self.minimum_sensor_weight
+        return self._tally_cache
+
     # Compute current turn score for given team for board 1, but do not update display or game variables
     def tally_turn_board_1(self, team):
-        on_board = self.tally_location(team, Location.BOARD_1)
-        in_hole = self.tally_location(team, Location.HOLE_1)
-        return on_board + in_hole
+        a1, b1, _, _ = self._ensure_tallies()
+        return a1 if team is Team.A else b1
 
     # Compute current turn score for given team for board 2, but do not update display or game variables
     def tally_turn_board_2(self, team):
-        on_board = self.tally_location(team, Location.BOARD_2)
-        in_hole = self.tally_location(team, Location.HOLE_2)
-        return on_board + in_hole
+        _, _, a2, b2 = self._ensure_tallies()
+        return a2 if team is Team.A else b2
 
     # Update game variables with current turn scores for both teams. Does not update display.
     def update_turn_score(self, board_number):
+        a1, b1, a2, b2 = self._ensure_tallies()
         if board_number == 1:
-            self.team_a_turn_score = self.tally_turn_board_1(Team.A)
-            self.team_b_turn_score = self.tally_turn_board_1(Team.B)
+            self.team_a_turn_score = a1
+            self.team_b_turn_score = b1
             self.last_board_played = 1
         else:
-            self.team_a_turn_score = self.tally_turn_board_2(Team.A)
-            self.team_b_turn_score = self.tally_turn_board_2(Team.B)
+            self.team_a_turn_score = a2
+            self.team_b_turn_score = b2
             self.last_board_played = 2
 
+    # Check whether no bags for either team remain on either board, according to the most recent sensor reading.
     def are_boards_clear(self):
-        return 0 == self.tally_turn_board_1(Team.A) + self.tally_turn_board_1(Team.B)
+        a1, b1, a2, b2 = self._ensure_tallies()
+        # Tallies are never negative, so this is zero only if all of them are.
+        return 0 == a1 | b1 | a2 | b2
 
     def total_score(self, team):
-        if team == Team.A:
+        if team is Team.A:
             return self.team_a_game_score + max(0, self.team_a_turn_score - self.team_b_turn_score)
         else:
             return self.team_b_game_score + max(0, self.team_b_turn_score - self.team_a_turn_score)
@@ -206,13 +346,30 @@ class Game(object):
     #            Timing Related              #
     ##########################################
 
-    # Get the smallest of the several time periods that are important to the game, to use as the time 
-    # to sleep between checking the sensors and buttons.
+    # Get the smallest of the several time periods that are important to the game.
+    # No longer used by play(), which sleeps for seconds_until_next_poll instead.
     def poll_interval_in_seconds(self):
         return min(self.rfid_polling_interval_in_seconds, self.button_polling_interval_in_seconds, self.timeout_in_seconds)
 
-    def current_turn_duration_in_seconds(self):
-        return time.time() - self.time_of_turn_start
+    # Get how long to sleep until get_event next has something to do: read the sensors, read the buttons or issue a timeout.
+    # Never less than a hundredth of a second, so the event loop cannot spin.
+    def seconds_until_next_poll(self):
+        now = time.time()
+        next_sensor_read = self.time_of_last_sensor_read + self.rfid_polling_interval_in_seconds
+        # Buttons are ignored during the first four seconds of a turn.
+        next_button_read = max(self.time_of_last_button_read + self.button_polling_interval_in_seconds, self._turn_button_enable_time)
+        next_deadline = min(next_sensor_read, next_button_read)
+        # Once the timeout has passed it stays passed until the next turn, so only wait for it if it lies ahead.
+        timeout = self.time_of_turn_start + self.timeout_in_seconds
+        if timeout > now:
+            next_deadline = min(next_deadline, timeout)
+        return max(0.01, next_deadline - now)
+
+    # Pass in the current time if it is already known, to save asking for it again.
+    def current_turn_duration_in_seconds(self, now = None):
+        if now is None:
+            now = time.time()
+        return now - self.time_of_turn_start
 
     ##########################################
     #          I/O Device Interfaces         #
@@ -223,9 +380,40 @@ class Game(object):
         return self.get_button_state()
 
     def read_sensors(self):
-        for sensor in self.sensors:
-            sensor.read()
+        if self.read_sensors_in_parallel and len(self.sensors) > 1:
+            if self._sensor_pool is None:
+                self._sensor_pool = concurrent.futures.ThreadPoolExecutor(max_workers = len(self.sensors))
+            # Reading a sensor mostly waits on the device, so read them all at once.
+            # Consuming the results waits for every read to finish and re-raises any exception.
+            list(self._sensor_pool.map(lambda sensor : sensor.read(), self.sensors))
+        else:
+            for sensor in self.sensors:
+                sensor.read()
+        self._decode_readings()
         self.time_of_last_sensor_read = time.time()
+        # Invalidates the cached tallies.
+        self._sensor_read_seq += 1
+
+    # Release the threads used to read the sensors. The game may still be played afterwards.
+    def close(self):
+        if self._sensor_pool is not None:
+            self._sensor_pool.shutdown()
+            self._sensor_pool = None
+
+    # Translate the latest readings of the scoring sensors from rfids into tag indices, all in one flat list,
+    # so that tallying does not have to look up strings. Rfids that do not belong to any tag are dropped.
+    def _decode_readings(self):
+        rfid_to_tag_index = self._rfid_to_tag_index
+        reading_tags = []
+        reading_offsets = [0]
+        for sensor in self._scoring_sensors:
+            for rfid in sensor.latest_reading:
+                tag_index = rfid_to_tag_index.get(rfid)
+                if tag_index is not None:
+                    reading_tags.append(tag_index)
+            reading_offsets.append(len(reading_tags))
+        self._reading_tags = reading_tags
+        self._reading_offsets = reading_offsets
 
     # Display the scores plus the optional message
     def display(self, message):
@@ -251,7 +439,7 @@ class Game(object):
         # Possibly check for a button press.
         # If the current turn has not been going on long enough, ignore the buttons;
         # the player was holding don the button too long or clicked it multiple times in succession.
-        if self.current_turn_duration_in_seconds() > 4 and now - self.time_of_last_button_read >= self.button_polling_interval_in_seconds:
+        if now >= self._turn_button_enable_time and now - self.time_of_last_button_read >= self.button_polling_interval_in_seconds:
             button_state = self.read_buttons()
             # If the button was pressed on either Board 1 or Board 2, we do the same thing.
             if button_state[0] or button_state[1]:
@@ -261,10 +449,7 @@ class Game(object):
         # Check for potential changes in the turn score due to tags being added or removed.
         if now - self.time_of_last_sensor_read >= self.rfid_polling_interval_in_seconds:
             self.read_sensors()
-            a1 = self.tally_turn_board_1(Team.A)
-            b1 = self.tally_turn_board_1(Team.B)
-            a2 = self.tally_turn_board_2(Team.A)
-            b2 = self.tally_turn_board_2(Team.B)
+            a1, b1, a2, b2 = self._ensure_tallies()
 
             if a1+b1 > 0:
                 # Is Activity definitely on Board 1?
@@ -285,7 +470,7 @@ class Game(object):
                     return GameEvent.TAGS_CHANGED_ON_BOARD_2
         # No button pressed and no change to tags read.
         # Check for a timeout.
-        if self.current_turn_duration_in_seconds() >= self.timeout_in_seconds:
+        if self.current_turn_duration_in_seconds(now) >= self.timeout_in_seconds:
             return GameEvent.TIMEOUT
         else:
             return GameEvent.NO_CHANGE
@@ -295,21 +480,21 @@ class Game(object):
     ##########################################
 
     def process_start_state(self, event):
-        if event == GameEvent.NO_CHANGE:
+        if event is GameEvent.NO_CHANGE:
             return GameState.START
-        elif event == GameEvent.TIMEOUT:
+        elif event is GameEvent.TIMEOUT:
             return GameState.START
-        elif event == GameEvent.TAGS_CHANGED_ON_BOARD_1:
-            self.turn_number = 1
+        elif event is GameEvent.TAGS_CHANGED_ON_BOARD_1:
+            self._set_turn_number(1)
             self.update_turn_score(1)
             self.display('')
             return GameState.PLAYING_BOARD_1
-        elif event == GameEvent.TAGS_CHANGED_ON_BOARD_2:
-            self.turn_number = 1
+        elif event is GameEvent.TAGS_CHANGED_ON_BOARD_2:
+            self._set_turn_number(1)
             self.update_turn_score(2)
-            self.display(f'Turn {self.turn_number}')
+            self.display(self._turn_message)
             return GameState.PLAYING_BOARD_2
-        elif event == GameEvent.BUTTON_PRESSED:
+        elif event is GameEvent.BUTTON_PRESSED:
             return GameState.START
         else:
             return GameState.START
@@ -318,25 +503,25 @@ class Game(object):
         if self.have_reached_winning_score():
             self.display('Game Over')
             return GameState.GAME_OVER
-        if event == GameEvent.NO_CHANGE:
+        if event is GameEvent.NO_CHANGE:
             return GameState.PLAYING_BOARD_1
-        elif event == GameEvent.TIMEOUT:
+        elif event is GameEvent.TIMEOUT:
             # Timeout here ends the turn
             self.update_turn_score(1)
             self.end_turn()
-            self.display(f'Turn {self.turn_number}')
+            self.display(self._turn_message)
             return GameState.TURN_OVER
-        elif event == GameEvent.TAGS_CHANGED_ON_BOARD_1:
+        elif event is GameEvent.TAGS_CHANGED_ON_BOARD_1:
             self.update_turn_score(1)
-            self.display(f'Turn {self.turn_number}')
+            self.display(self._turn_message)
             return GameState.PLAYING_BOARD_1
-        elif event == GameEvent.TAGS_CHANGED_ON_BOARD_2:
+        elif event is GameEvent.TAGS_CHANGED_ON_BOARD_2:
             # Error condition - bags on two boards at once!
             return GameState.PLAYING_BOARD_1
-        elif event == GameEvent.BUTTON_PRESSED:
+        elif event is GameEvent.BUTTON_PRESSED:
             self.update_turn_score(1)
             self.end_turn()
-            self.display(f'Turn {self.turn_number}')
+            self.display(self._turn_message)
             return GameState.TURN_OVER
         else:
             return GameState.PLAYING_BOARD_1
@@ -345,25 +530,25 @@ class Game(object):
         if self.have_reached_winning_score():
             self.display('Game Over')
             return GameState.GAME_OVER
-        if event == GameEvent.NO_CHANGE:
+        if event is GameEvent.NO_CHANGE:
             return GameState.PLAYING_BOARD_2
-        elif event == GameEvent.TIMEOUT:
+        elif event is GameEvent.TIMEOUT:
             # Timeout here ends the turn
             self.update_turn_score(2)
             self.end_turn()
-            self.display(f'Turn {self.turn_number}')
+            self.display(self._turn_message)
             return GameState.TURN_OVER
-        elif event == GameEvent.TAGS_CHANGED_ON_BOARD_1:
+        elif event is GameEvent.TAGS_CHANGED_ON_BOARD_1:
             # Error condition - bags on two boards at once!
             return GameState.PLAYING_BOARD_2
-        elif event == GameEvent.TAGS_CHANGED_ON_BOARD_2:
+        elif event is GameEvent.TAGS_CHANGED_ON_BOARD_2:
             self.update_turn_score(2)
-            self.display(f'Turn {self.turn_number}')
+            self.display(self._turn_message)
             return GameState.PLAYING_BOARD_2
-        elif event == GameEvent.BUTTON_PRESSED:
+        elif event is GameEvent.BUTTON_PRESSED:
             self.update_turn_score(2)
             self.end_turn()
-            self.display(f'Turn {self.turn_number}')
+            self.display(self._turn_message)
             return GameState.TURN_OVER
         else:
             return GameState.PLAYING_BOARD_2
@@ -378,9 +563,9 @@ class Game(object):
         elif self.have_reached_winning_score():
             self.display('Game Over')
             return GameState.GAME_OVER
-        elif event == GameEvent.TIMEOUT:
+        elif event is GameEvent.TIMEOUT:
             return GameState.GAME_OVER
-        elif event == GameEvent.BUTTON_PRESSED:
+        elif event is GameEvent.BUTTON_PRESSED:
             return GameState.GAME_OVER
         else:
             return GameState.TURN_OVER
@@ -390,42 +575,42 @@ class Game(object):
         if self.have_reached_winning_score():
             self.display('Game Over')
             return GameState.GAME_OVER
-        if event == GameEvent.NO_CHANGE:
+        if event is GameEvent.NO_CHANGE:
             return GameState.BOARD_CLEAR
-        elif event == GameEvent.TIMEOUT:
+        elif event is GameEvent.TIMEOUT:
             return GameState.GAME_OVER
-        elif event == GameEvent.TAGS_CHANGED_ON_BOARD_1:
+        elif event is GameEvent.TAGS_CHANGED_ON_BOARD_1:
             self.update_turn_score(1)
-            self.display(f'Turn {self.turn_number}')
+            self.display(self._turn_message)
             return GameState.PLAYING_BOARD_1
-        elif event == GameEvent.TAGS_CHANGED_ON_BOARD_2:
+        elif event is GameEvent.TAGS_CHANGED_ON_BOARD_2:
             self.update_turn_score(2)
-            self.display(f'Turn {self.turn_number}')
+            self.display(self._turn_message)
             return GameState.PLAYING_BOARD_2
-        elif event == GameEvent.BUTTON_PRESSED:
+        elif event is GameEvent.BUTTON_PRESSED:
             return GameState.GAME_OVER
         else:
             return GameState.BOARD_CLEAR
 
     def process_playing_game_over_state(self, event):
         self.display('Game Over')
-        if event == GameEvent.NO_CHANGE:
+        if event is GameEvent.NO_CHANGE:
             return GameState.GAME_OVER
-        elif event == GameEvent.TIMEOUT:
+        elif event is GameEvent.TIMEOUT:
             self.new_game()
             self.display('New Game')
             return GameState.START
-        elif event == GameEvent.TAGS_CHANGED_ON_BOARD_1:
+        elif event is GameEvent.TAGS_CHANGED_ON_BOARD_1:
             self.new_game()
             self.update_turn_score(1)
             self.display('New Game')
             return GameState.PLAYING_BOARD_1
-        elif event == GameEvent.TAGS_CHANGED_ON_BOARD_2:
+        elif event is GameEvent.TAGS_CHANGED_ON_BOARD_2:
             self.new_game()
             self.update_turn_score(2)
             self.display('New Game')
             return GameState.PLAYING_BOARD_2
-        elif event == GameEvent.BUTTON_PRESSED:
+        elif event is GameEvent.BUTTON_PRESSED:
             self.new_game()
             self.display('New Game')
             return GameState.START
@@ -437,24 +622,23 @@ class Game(object):
         print("Begin game\n")
         self.state = GameState.START
         state_machine = {
-            GameState.START : lambda event : self.process_start_state(event),
-            GameState.PLAYING_BOARD_1 : lambda event : self.process_playing_board_1_state(event),
-            GameState.PLAYING_BOARD_2 : lambda event : self.process_playing_board_2_state(event),
-            GameState.BOARD_CLEAR : lambda event : self.process_board_clear_state(event),
-            GameState.TURN_OVER : lambda event : self.process_turn_over_state(event),
-            GameState.GAME_OVER : lambda event : self.process_playing_game_over_state(event),
+            GameState.START : self.process_start_state,
+            GameState.PLAYING_BOARD_1 : self.process_playing_board_1_state,
+            GameState.PLAYING_BOARD_2 : self.process_playing_board_2_state,
+            GameState.BOARD_CLEAR : self.process_board_clear_state,
+            GameState.TURN_OVER : self.process_turn_over_state,
+            GameState.GAME_OVER : self.process_playing_game_over_state,
         }
         event = GameEvent.NO_CHANGE
-        poll_interval = self.poll_interval_in_seconds()
-        while event != GameEvent.QUIT:
+        while event is not GameEvent.QUIT:
             event = self.get_event()
             action = state_machine[self.state]
             previous_state = self.state
             self.state = action(event)
-            transition_message = f'Event {event.name} transitions From {previous_state.name} To {self.state.name}'
-            if previous_state != GameState.START or self.state != GameState.START or event != GameEvent.NO_CHANGE:
-                self.log(transition_message)
-            time.sleep(poll_interval)
+            # Only build the message if it is going to be logged.
+            if self.log is not None and (previous_state is not GameState.START or self.state is not GameState.START or event is not GameEvent.NO_CHANGE):
+                self.log(f'Event {event.name} transitions From {previous_state.name} To {self.state.name}')
+            time.sleep(self.seconds_until_next_poll())
 
     ##########################################
     #            Constructor                 #
@@ -478,6 +662,9 @@ class Game(object):
         # All the RFID tags, matching each tag to a team (a List of Tag)
         self.tags = tags
 
+        # Lookup tables derived from the tags and sensors, used to speed up tallying scores.
+        self.index_tags_and_sensors()
+
         # Sum up the weights of all tripped sensors. If it exceeds or equals this, that bean bag counts.
         self.minimum_sensor_weight = 1
 
@@ -513,7 +700,26 @@ class Game(object):
         # Last time (in seconds since the epoch) that we checked the button state.
         self.time_of_last_button_read = time.time()
 
-        self.log = lambda message : message
+        # Incremented each time the sensors are read. The turn tallies are only recomputed
+        # when this differs from the sequence number they were computed for,
+        # or minimum_sensor_weight differs from the weight they were computed with.
+        self._sensor_read_seq = 0
+        self._tally_cache_seq = -1
+        self._tally_cache_weight = None
+        self._tally_cache = (0, 0, 0, 0)
+
+        # Whether to read all the sensors at the same time, each on its own thread.
+        # Off by default, because readers often share one serial bus or multiplexer.
+        # Only turn this on if the read_tags callbacks can safely be called concurrently.
+        self.read_sensors_in_parallel = False
+
+        # Threads for reading the sensors, created on first use. Released by close().
+        self._sensor_pool = None
+
+        # Callback that logs the state transitions of the game, or None to not log them.
+        # Expected signature: 
+        #   lambda message : None
+        self.log = None
 
     def __str__(self):
         return f'Team A: {self.team_a_game_score}  Team B: {self.team_b_game_score}'
@@ -563,17 +769,22 @@ class CornHoleApp:
     def redisplay_scores(self):
         a_score = self.get_total_score("A")
         b_score = self.get_total_score("B")
-        self.team_a_score_variable.set(f'{a_score}')
-        self.team_b_score_variable.set(f'{b_score}')
-        self.team_a_turn_score_variable.set(f'   {self.scores[1]}')
-        self.team_b_turn_score_variable.set(f'   {self.scores[3]}')
         if a_score >= 21 and a_score > b_score:
             message = 'Home wins!'
         elif b_score >= 21 and b_score > a_score:
             message = 'Visitors win!'
         else:
             message = f'Turn {self.turn_number}'
+        # Setting a StringVar makes Tk redraw, so skip it if nothing on the display would change.
+        displayed = (a_score, b_score, self.scores[1], self.scores[3], message)
+        if displayed == self._last_displayed:
+            return
+        self.team_a_score_variable.set(f'{a_score}')
+        self.team_b_score_variable.set(f'{b_score}')
+        self.team_a_turn_score_variable.set(f'   {self.scores[1]}')
+        self.team_b_turn_score_variable.set(f'   {self.scores[3]}')
         self.message_variable.set(message)
+        self._last_displayed = displayed
 
     def build(self):
         self.window = tk.Tk()
@@ -584,6 +795,8 @@ class CornHoleApp:
         self.team_a_turn_score_variable = tk.StringVar()
         self.team_b_turn_score_variable = tk.StringVar()
         self.message_variable = tk.StringVar()
+        # What the variables above were last set to by redisplay_scores
+        self._last_displayed = None
 
         self.font = tkinter.font.Font(root = self.window, family = 'Helvetica', size = 18, weight = "bold")
         self.medium_font = tkinter.font.Font(root = self.window, family = 'Helvetica', size = 42, weight = "bold")
@@ -700,6 +913,7 @@ if len(sys.argv) > 1 and sys.argv[len(sys.argv) - 1] == "test":
     print('Command line Corn Hole tester\n')
     test_game = TestGame()
     test_game.game.play()
+    test_game.game.close()
     print('Quitting\n')
 else:
     app = CornHoleApp()